@@ -11,10 +11,13 @@ st.set_page_config(page_title="Text Summarizer", layout="wide")
 st.title("📘 Research Paper Summarizer")
 
 # -----------------------------------------------------
-# Initialize the model only once (avoid reloads)
+# Initialize the model only once per process (shared across sessions)
 # -----------------------------------------------------
-if "bot" not in st.session_state:
-    st.session_state.bot = GemmaBot()
+@st.cache_resource
+def get_bot():
+    return GemmaBot()
+
+bot = get_bot()
 
 # -----------------------------------------------------
 # Input Fields
@@ -41,10 +44,9 @@ length_input = st.selectbox(
 user_note = st.text_area("Enter your note (optional):", height=100)
 
 # -----------------------------------------------------
-# Build Prompt Template
+# Build Prompt Template (parsed once, only formatted per rerun)
 # -----------------------------------------------------
-template = PromptTemplate(
-    template="""
+_TEMPLATE_STR = """
 Summarize the research paper titled "{paper_input}" with the following specifications:
 
 Explanation Style: {style_input}
@@ -62,10 +64,17 @@ If certain information is not available in the paper, respond with:
 "Insufficient information available" instead of guessing.
 
 Ensure the summary is clear, accurate, and aligned with the specified style and length.
-""",
-    input_variables=["paper_input", "style_input", "length_input", "user_note"], 
-    validate_template=True
-)
+"""
+
+@st.cache_resource
+def get_template():
+    return PromptTemplate(
+        template=_TEMPLATE_STR,
+        input_variables=["paper_input", "style_input", "length_input", "user_note"],
+        validate_template=True
+    )
+
+template = get_template()
 
 prompt = template.format(
     paper_input=paper_input,
@@ -87,7 +96,7 @@ if st.button("Submit"):
     else:
         with st.spinner("🔄 Generating summary..."):
             try:
-                response = st.session_state.bot.run(prompt)
+                response = bot.run(prompt)
                 st.success("✅ Summarization complete!")
                 st.subheader("📝 Summary Output:")
                 st.write(response)
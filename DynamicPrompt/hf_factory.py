@@ -0,0 +1,42 @@
+# hf_factory.py
+import functools
+from typing import Optional
+
+
+@functools.cache
+def load_env() -> None:
+    """Load .env once per process; find_dotenv() walks every parent directory."""
+    from dotenv import load_dotenv, find_dotenv
+
+    load_dotenv(find_dotenv())
+
+
+@functools.lru_cache(maxsize=16)
+def get_chat_model(repo_id: str,
+                   task: str,
+                   temperature: float,
+                   max_new_tokens: Optional[int],
+                   token: str):
+    """
+    Return a ChatHuggingFace for this endpoint config, shared by every bot in
+    the process (one HF client per config instead of one per bot instance).
+    max_new_tokens=None keeps the endpoint's default; temperature 0 means greedy
+    decoding (sampling disabled).
+    """
+    from langchain_huggingface import HuggingFaceEndpoint, ChatHuggingFace
+
+    endpoint_kwargs, chat_kwargs = {}, {}
+    if max_new_tokens is not None:
+        endpoint_kwargs["max_new_tokens"] = max_new_tokens
+        chat_kwargs["max_tokens"] = max_new_tokens
+    llm = HuggingFaceEndpoint(
+        repo_id=repo_id,
+        task=task,
+        huggingfacehub_api_token=token,
+        temperature=temperature,
+        do_sample=temperature > 0,
+        **endpoint_kwargs,
+    )
+    # ChatHuggingFace builds chat_completion params from its own fields and
+    # ignores the endpoint's sampling settings, so they must be set here too
+    return ChatHuggingFace(llm=llm, temperature=temperature, **chat_kwargs)
@@ -1,7 +1,4 @@
-from langchain_core.prompts import PromptTemplate
-
-template = PromptTemplate(
-    template="""
+TEMPLATE_STR = """
 Summarize the research paper titled "{paper_input}" with the following specifications:
 
 Explanation Style: {style_input}
@@ -17,9 +14,19 @@ If certain information is not available in the paper, respond with:
 "Insufficient information available" instead of guessing.
 
 Ensure the summary is clear, accurate, and aligned with the specified style and length.
-""",
-    input_variables=["paper_input", "style_input", "length_input"], 
-    validate_template=True
-)
+"""
+
+INPUT_VARIABLES = ["paper_input", "style_input", "length_input"]
+
+# Validation and writing template.json only happen when run as a script,
+# so importing this module doesn't touch the disk
+if __name__ == "__main__":
+    from langchain_core.prompts import PromptTemplate
+
+    template = PromptTemplate(
+        template=TEMPLATE_STR,
+        input_variables=INPUT_VARIABLES,
+        validate_template=True
+    )
 
-template.save('template.json')
+    template.save('template.json')
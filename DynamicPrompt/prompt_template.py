@@ -11,10 +11,13 @@ st.set_page_config(page_title="Text Summarizer", layout="wide")
 st.title("📘 Research Paper Summarizer")
 
 # -----------------------------------------------------
-# Initialize the model only once (avoid reloads)
+# Initialize the model only once per process (shared across sessions)
 # -----------------------------------------------------
-if "bot" not in st.session_state:
-    st.session_state.bot = GemmaBot()
+@st.cache_resource
+def get_bot():
+    return GemmaBot()
+
+bot = get_bot()
 
 # -----------------------------------------------------
 # Input Fields
@@ -39,9 +42,13 @@ length_input = st.selectbox(
 )
 
 # -----------------------------------------------------
-# Build Prompt Template
+# Build Prompt Template (loaded once, only formatted per rerun)
 # -----------------------------------------------------
-template = load_prompt('template.json')
+@st.cache_resource
+def get_template():
+    return load_prompt('template.json')
+
+template = get_template()
 prompt = template.format(
     paper_input=paper_input,
     style_input=style_input,
@@ -61,7 +68,7 @@ if st.button("Submit"):
     else:
         with st.spinner("🔄 Generating summary..."):
             try:
-                response = st.session_state.bot.run(prompt)
+                response = bot.run(prompt)
                 st.success("✅ Summarization complete!")
                 st.subheader("📝 Summary Output:")
                 st.write(response)
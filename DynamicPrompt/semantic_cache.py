@@ -0,0 +1,104 @@
+# semantic_cache.py
+import atexit
+import importlib.util
+import json
+import os
+import re
+import threading
+from typing import List, Optional, Tuple
+
+
+class SemanticCache:
+    """
+    Embedding-based response cache: a query whose cosine similarity to a cached
+    query is >= `threshold` gets the cached response (catches paraphrases that
+    an exact-match cache misses).
+    sentence-transformers and faiss are only imported on first use.
+    """
+
+    def __init__(self,
+                 namespace: str,
+                 model_name: str = "all-MiniLM-L6-v2",
+                 threshold: float = 0.95,
+                 max_query_chars: int = 1000,
+                 persist_dir: Optional[str] = "cache"):
+        self.model_name = model_name
+        self.threshold = threshold
+        # The embedding model truncates long inputs, so two long documents that
+        # share an opening would look identical; only short queries are cached.
+        self.max_query_chars = max_query_chars
+        self.persist_dir = persist_dir
+        self._name = re.sub(r"[^A-Za-z0-9_.-]+", "_", namespace)
+
+        self._model = None
+        self._index = None
+        self._responses: List[str] = []
+        self._lock = threading.Lock()
+        self._dirty = False
+
+    @staticmethod
+    def available() -> bool:
+        return all(importlib.util.find_spec(m) is not None for m in ("faiss", "sentence_transformers"))
+
+    def _paths(self) -> Tuple[str, str]:
+        base = os.path.join(self.persist_dir, f"semantic_{self._name}")
+        return base + ".faiss", base + ".json"
+
+    def _ensure_loaded(self):
+        if self._model is not None:
+            return
+        import faiss
+        from sentence_transformers import SentenceTransformer
+
+        model = SentenceTransformer(self.model_name)
+        index = None
+        if self.persist_dir:
+            index_path, responses_path = self._paths()
+            if os.path.exists(index_path) and os.path.exists(responses_path):
+                index = faiss.read_index(index_path)
+                with open(responses_path, "r", encoding="utf-8") as f:
+                    self._responses = json.load(f)
+            atexit.register(self.save)
+        if index is None or index.ntotal != len(self._responses):
+            # inner product on normalized vectors == cosine similarity
+            index = faiss.IndexFlatIP(model.get_sentence_embedding_dimension())
+            self._responses = []
+        self._index = index
+        self._model = model
+
+    def lookup(self, query: str):
+        """
+        Return (cached_response_or_None, embedding). Pass the embedding to add()
+        on a miss so the query isn't encoded twice. Embedding is None when the
+        query is not eligible for semantic caching.
+        """
+        if len(query) > self.max_query_chars:
+            return None, None
+        with self._lock:
+            self._ensure_loaded()
+            emb = self._model.encode([query], normalize_embeddings=True).astype("float32")
+            if self._index.ntotal:
+                scores, ids = self._index.search(emb, 1)
+                if scores[0][0] >= self.threshold:
+                    return self._responses[ids[0][0]], emb
+        return None, emb
+
+    def add(self, embedding, response: str) -> None:
+        with self._lock:
+            self._index.add(embedding)
+            self._responses.append(response)
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the index and responses to persist_dir (called at interpreter exit)."""
+        if not (self.persist_dir and self._dirty and self._index is not None):
+            return
+        import faiss
+
+        with self._lock:
+            os.makedirs(self.persist_dir, exist_ok=True)
+            index_path, responses_path = self._paths()
+            faiss.write_index(self._index, index_path)
+            with open(responses_path, "w", encoding="utf-8") as f:
+                json.dump(self._responses, f)
+            self._dirty = False
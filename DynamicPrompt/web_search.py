@@ -1,82 +1,211 @@
+import asyncio
 import time
-from typing import List, Dict
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from selectolax.lexbor import LexborHTMLParser
 from logger import setup_logger
 
 logger = setup_logger("web_search", log_dir="logs", level=20)  # level=20 -> INFO by default
 
 DUCK_SEARCH_URL = "https://duckduckgo.com/html/"
 
+_SNIPPET_SEL = ".result__snippet, .result__snippet--2line, .result__content .result__snippet"
+
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
                   "AppleWebKit/537.36 (KHTML, like Gecko) "
                   "Chrome/117.0.0.0 Safari/537.36"
 }
 
-def duckduckgo_search(query: str, num_results: int = 5, pause: float = 0.2) -> List[Dict]:
-    """
-    Perform a DuckDuckGo HTML search and return a list of results:
-    [{"title": ..., "link": ..., "snippet": ...}, ...]
-    """
-    logger.info("Starting DuckDuckGo search: %s", query)
-    if not query or not query.strip():
-        logger.warning("Empty query provided to duckduckgo_search()")
+# Shared session so repeated searches reuse pooled keep-alive connections
+_SESSION = requests.Session()
+_SESSION.headers.update(HEADERS)
+_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=2)
+_SESSION.mount("https://", _adapter)
+_SESSION.mount("http://", _adapter)
+
+# TTL + LRU cache of parsed results keyed on (query, num_results), so reruns and
+# retries of the same search don't repeat the network round-trip
+_CACHE_TTL = 600  # seconds
+_CACHE_MAXSIZE = 256
+_search_cache: "OrderedDict[Tuple[str, int], Tuple[float, List[Dict]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_get(key: Tuple[str, int]) -> Optional[List[Dict]]:
+    with _cache_lock:
+        hit = _search_cache.get(key)
+        if hit is None:
+            return None
+        stored_at, results = hit
+        if time.monotonic() - stored_at > _CACHE_TTL:
+            del _search_cache[key]
+            return None
+        _search_cache.move_to_end(key)
+    # hand out copies so callers can't mutate the cached entries
+    return [dict(r) for r in results]
+
+
+def _cache_put(key: Tuple[str, int], results: List[Dict]) -> None:
+    with _cache_lock:
+        _search_cache[key] = (time.monotonic(), [dict(r) for r in results])
+        _search_cache.move_to_end(key)
+        while len(_search_cache) > _CACHE_MAXSIZE:
+            _search_cache.popitem(last=False)
+
+
+def _parse_results(html: str, num_results: int) -> List[Dict]:
+    """Extract up to `num_results` title/link/snippet dicts from a DuckDuckGo HTML page."""
+    # Block/captcha pages carry no result anchors; skip parsing them
+    if "result__a" not in html:
+        logger.info("No DuckDuckGo results in response body")
         return []
 
-    params = {"q": query}
-    try:
-        resp = requests.get(DUCK_SEARCH_URL, params=params, headers=HEADERS, timeout=10)
-        resp.raise_for_status()
-    except requests.RequestException as e:
-        logger.exception("HTTP request to DuckDuckGo failed: %s", e)
-        raise
-
-    soup = BeautifulSoup(resp.text, "html.parser")
+    # selectolax (lexbor C parser) is far cheaper than building a BeautifulSoup tree
+    tree = LexborHTMLParser(html)
 
     results = []
-    anchors = soup.select("a.result__a")
-    logger.info("Found %d result anchors (raw) on DuckDuckGo page", len(anchors))
+    anchors = tree.css("a.result__a")[:num_results]
+    logger.info("Selected %d result anchors on DuckDuckGo page", len(anchors))
 
-    for a in anchors[:num_results]:
+    for a in anchors:
         try:
-            title = a.get_text(strip=True)
-            href = a.get("href")
+            title = a.text(strip=True)
+            href = a.attributes.get("href")
             snippet = ""
 
-            parent = a.find_parent()
+            parent = a.parent
             if parent:
-                sn = parent.select_one(".result__snippet, .result__snippet--2line, .result__content .result__snippet")
+                sn = parent.css_first(_SNIPPET_SEL)
                 if sn:
-                    snippet = sn.get_text(" ", strip=True)
+                    snippet = sn.text(separator=" ", strip=True)
 
             if not snippet:
                 ancestor = a
                 for _ in range(3):
-                    ancestor = ancestor.find_parent()
+                    ancestor = ancestor.parent
                     if not ancestor:
                         break
-                    sn = ancestor.select_one(".result__snippet, .result__snippet--2line, .result__content .result__snippet")
+                    sn = ancestor.css_first(_SNIPPET_SEL)
                     if sn:
-                        snippet = sn.get_text(" ", strip=True)
+                        snippet = sn.text(separator=" ", strip=True)
                         break
 
             if not snippet:
-                sib = a.find_next_sibling(text=True)
-                if sib and isinstance(sib, str):
-                    snippet = sib.strip()
+                sib = a.next
+                while sib is not None and sib.tag != "-text":
+                    sib = sib.next
+                if sib is not None:
+                    snippet = sib.text(deep=False).strip()
 
             results.append({"title": title, "link": href, "snippet": snippet})
             logger.debug("Result added: title=%s, link=%s", title[:80], href)
-            time.sleep(pause)
         except Exception as e:
             logger.exception("Error while parsing an anchor element: %s", e)
             # continue to next anchor
 
+    return results
+
+
+def duckduckgo_search(query: str, num_results: int = 5, pause: float = 0.0) -> List[Dict]:
+    """
+    Perform a DuckDuckGo HTML search and return a list of results:
+    [{"title": ..., "link": ..., "snippet": ...}, ...]
+    `pause` is an optional politeness delay applied once before the HTTP request.
+    Non-empty results are cached in-process for _CACHE_TTL seconds.
+    """
+    logger.info("Starting DuckDuckGo search: %s", query)
+    if not query or not query.strip():
+        logger.warning("Empty query provided to duckduckgo_search()")
+        return []
+
+    cache_key = (query, num_results)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        logger.info("Returning %d cached results", len(cached))
+        return cached
+
+    params = {"q": query}
+    if pause > 0:
+        time.sleep(pause)
+    try:
+        resp = _SESSION.get(DUCK_SEARCH_URL, params=params, timeout=10)
+        resp.raise_for_status()
+    except requests.RequestException as e:
+        logger.exception("HTTP request to DuckDuckGo failed: %s", e)
+        raise
+
+    results = _parse_results(resp.text, num_results)
+
     logger.info("Returning %d parsed results", len(results))
+    if results:
+        _cache_put(cache_key, results)
     return results
 
 
+async def duckduckgo_search_async(query: str, num_results: int = 5, session=None) -> List[Dict]:
+    """
+    Async variant of duckduckgo_search() on aiohttp. Pass a shared
+    aiohttp.ClientSession to reuse its connection pool across queries;
+    otherwise a one-off session is opened for this call.
+    """
+    import aiohttp
+
+    logger.info("Starting async DuckDuckGo search: %s", query)
+    if not query or not query.strip():
+        logger.warning("Empty query provided to duckduckgo_search_async()")
+        return []
+
+    cache_key = (query, num_results)
+    cached = _cache_get(cache_key)
+    if cached is not None:
+        logger.info("Returning %d cached results", len(cached))
+        return cached
+
+    own_session = session is None
+    if own_session:
+        session = aiohttp.ClientSession(headers=HEADERS)
+    try:
+        async with session.get(DUCK_SEARCH_URL, params={"q": query},
+                               timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            resp.raise_for_status()
+            html = await resp.text()
+    except aiohttp.ClientError as e:
+        logger.exception("Async HTTP request to DuckDuckGo failed: %s", e)
+        raise
+    finally:
+        if own_session:
+            await session.close()
+
+    results = _parse_results(html, num_results)
+
+    logger.info("Returning %d parsed results", len(results))
+    if results:
+        _cache_put(cache_key, results)
+    return results
+
+
+async def _search_many(queries: List[str], num_results: int) -> List[List[Dict]]:
+    import aiohttp
+
+    connector = aiohttp.TCPConnector(limit=20, limit_per_host=10, keepalive_timeout=30)
+    async with aiohttp.ClientSession(connector=connector, headers=HEADERS) as session:
+        return await asyncio.gather(
+            *(duckduckgo_search_async(q, num_results, session=session) for q in queries)
+        )
+
+
+def duckduckgo_search_many(queries: List[str], num_results: int = 5) -> List[List[Dict]]:
+    """
+    Run several searches concurrently over one pooled aiohttp session.
+    Returns one result list per query, in the same order as `queries`.
+    """
+    return asyncio.run(_search_many(queries, num_results))
+
+
 def print_results(results: List[Dict]):
     """Print results to stdout in a friendly format and log the action."""
     if not results:
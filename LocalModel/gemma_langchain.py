@@ -4,61 +4,217 @@
 """
 Runs the locally downloaded Gemma model with LangChain.
 No API calls, no remote endpoints — pure local inference.
+
+torch / transformers / langchain are imported inside load_model(), so
+importing this module is cheap; the model is loaded on first inference.
 """
 
 import os
-import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
-from langchain.llms import HuggingFacePipeline
+import contextlib
 
 # ------------------------------------------------------------
 # Local Model Path
 # ------------------------------------------------------------
 LOCAL_MODEL_DIR = r"D:\Models\gemma-2b-it"  # same as previous script
 
-if not os.path.exists(LOCAL_MODEL_DIR):
-    raise FileNotFoundError(
-        f"Local model not found in '{LOCAL_MODEL_DIR}'. "
-        f"Please run 'download_gemma_model.py' first."
+# Load weights as 4-bit NF4 via bitsandbytes when a GPU is available
+# (requires `pip install bitsandbytes accelerate`)
+LOAD_IN_4BIT = True
+
+# Inference backend: "auto" uses vLLM (paged KV cache, fused kernels) when it is
+# installed and falls back to the Transformers pipeline; "vllm" / "hf" force one.
+BACKEND = "auto"
+
+_llm = None
+
+
+def _select_dtype(torch):
+    """bf16 on GPU, and on CPUs with native AVX-512 BF16; fp32 otherwise."""
+    if torch.cuda.is_available():
+        return torch.bfloat16
+    cpu_has_bf16 = getattr(torch.cpu, "_is_avx512_bf16_supported", lambda: False)
+    return torch.bfloat16 if cpu_has_bf16() else torch.float32
+
+
+def _inference_context():
+    """inference_mode plus fused (flash / memory-efficient) SDPA kernels on CUDA."""
+    import torch
+
+    stack = contextlib.ExitStack()
+    stack.enter_context(torch.inference_mode())
+    if torch.cuda.is_available():
+        from torch.nn.attention import SDPBackend, sdpa_kernel
+        stack.enter_context(sdpa_kernel([
+            SDPBackend.FLASH_ATTENTION,
+            SDPBackend.EFFICIENT_ATTENTION,
+            SDPBackend.MATH,  # fallback for shapes the fused kernels reject
+        ]))
+    return stack
+
+
+def _quantization_config(torch):
+    """Return a 4-bit BitsAndBytesConfig, or None if unavailable / disabled."""
+    if not (LOAD_IN_4BIT and torch.cuda.is_available()):
+        return None
+    try:
+        import bitsandbytes  # noqa: F401
+        from transformers import BitsAndBytesConfig
+    except ImportError:
+        print("⚠️  bitsandbytes not installed; loading unquantized weights.")
+        return None
+    return BitsAndBytesConfig(
+        load_in_4bit=True,
+        bnb_4bit_quant_type="nf4",
+        bnb_4bit_compute_dtype=torch.bfloat16,
+        bnb_4bit_use_double_quant=True,
     )
 
-print(f"🚀 Loading Gemma 2B model from: {LOCAL_MODEL_DIR}")
 
-# ------------------------------------------------------------
-# Load model and tokenizer locally
-# ------------------------------------------------------------
-tokenizer = AutoTokenizer.from_pretrained(LOCAL_MODEL_DIR)
-model = AutoModelForCausalLM.from_pretrained(
-    LOCAL_MODEL_DIR,
-    torch_dtype=torch.bfloat16 if torch.cuda.is_available() else torch.float32,
-    device_map="auto"
-)
+def _has_safetensors(model_dir: str) -> bool:
+    return any(name.endswith(".safetensors") for name in os.listdir(model_dir))
 
-# ------------------------------------------------------------
-# Create a text-generation pipeline
-# ------------------------------------------------------------
-generator = pipeline(
-    "text-generation",
-    model=model,
-    tokenizer=tokenizer,
-    max_new_tokens=256,
-    temperature=0.7,
-    top_p=0.9,
-    repetition_penalty=1.1
-)
 
-# ------------------------------------------------------------
-# Wrap with LangChain
-# ------------------------------------------------------------
-llm = HuggingFacePipeline(pipeline=generator)
+def _load_dispatched(torch, AutoModelForCausalLM):
+    """
+    Build the model skeleton on the meta device, then mmap the safetensors
+    shards straight onto their target devices layer by layer, instead of
+    materializing the full state dict first.
+    """
+    from accelerate import init_empty_weights, load_checkpoint_and_dispatch
+    from transformers import AutoConfig
+
+    dtype = _select_dtype(torch)
+    config = AutoConfig.from_pretrained(LOCAL_MODEL_DIR)
+    with init_empty_weights():
+        model = AutoModelForCausalLM.from_config(
+            config, torch_dtype=dtype, attn_implementation="sdpa"
+        )
+    model.tie_weights()
+
+    return load_checkpoint_and_dispatch(
+        model,
+        LOCAL_MODEL_DIR,
+        device_map="auto",
+        no_split_module_classes=model._no_split_modules or ["GemmaDecoderLayer"],
+        dtype=dtype,
+    )
+
+
+def _use_vllm() -> bool:
+    if BACKEND == "hf":
+        return False
+    try:
+        import vllm  # noqa: F401
+    except ImportError:
+        if BACKEND == "vllm":
+            raise
+        return False
+    return True
+
+
+def _load_vllm():
+    """vLLM engine behind LangChain's LLM interface."""
+    from langchain_community.llms import VLLM
+
+    print(f"🚀 Loading Gemma 2B model with vLLM from: {LOCAL_MODEL_DIR}")
+    return VLLM(
+        model=LOCAL_MODEL_DIR,
+        dtype="bfloat16",
+        trust_remote_code=True,
+        max_new_tokens=256,
+        temperature=0.7,
+        top_p=0.9,
+    )
+
+
+def _load_hf_pipeline():
+    """Transformers text-generation pipeline behind LangChain's LLM interface."""
+    import torch
+    from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
+    from langchain.llms import HuggingFacePipeline
+
+    print(f"🚀 Loading Gemma 2B model from: {LOCAL_MODEL_DIR}")
+
+    # ------------------------------------------------------------
+    # Load model and tokenizer locally
+    # ------------------------------------------------------------
+    tokenizer = AutoTokenizer.from_pretrained(LOCAL_MODEL_DIR)
+    bnb_config = _quantization_config(torch)
+    if bnb_config is None and _has_safetensors(LOCAL_MODEL_DIR):
+        model = _load_dispatched(torch, AutoModelForCausalLM)
+    else:
+        model = AutoModelForCausalLM.from_pretrained(
+            LOCAL_MODEL_DIR,
+            torch_dtype=_select_dtype(torch),
+            attn_implementation="sdpa",
+            quantization_config=bnb_config,
+            device_map="auto"
+        )
+    model.eval()
+
+    # Compile the forward pass (generate() stays eager and calls into it).
+    # Skipped for 4-bit weights: CUDA graphs + bnb kernels are not reliably supported.
+    if torch.cuda.is_available() and bnb_config is None:
+        model.forward = torch.compile(model.forward, mode="reduce-overhead", fullgraph=False)
+
+    # ------------------------------------------------------------
+    # Create a text-generation pipeline
+    # ------------------------------------------------------------
+    generator = pipeline(
+        "text-generation",
+        model=model,
+        tokenizer=tokenizer,
+        max_new_tokens=256,
+        temperature=0.7,
+        top_p=0.9,
+        repetition_penalty=1.1
+    )
+
+    # Warm up once so kernel selection / CUDA context setup happens here,
+    # not on the first real prompt
+    with _inference_context():
+        generator("warmup", max_new_tokens=4)
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+        torch.cuda.empty_cache()
+
+    # ------------------------------------------------------------
+    # Wrap with LangChain
+    # ------------------------------------------------------------
+    return HuggingFacePipeline(pipeline=generator)
+
+
+def load_model():
+    """Load the local Gemma model once and return the LangChain LLM wrapper."""
+    global _llm
+    if _llm is not None:
+        return _llm
+
+    if not os.path.exists(LOCAL_MODEL_DIR):
+        raise FileNotFoundError(
+            f"Local model not found in '{LOCAL_MODEL_DIR}'. "
+            f"Please run 'download_gemma_model.py' first."
+        )
+
+    _llm = _load_vllm() if _use_vllm() else _load_hf_pipeline()
+    return _llm
+
+
+def generate(prompt: str) -> str:
+    """Run a prompt through the local model, loading it on first use."""
+    llm = load_model()
+    with _inference_context():
+        return llm(prompt)
+
 
 # ------------------------------------------------------------
 # Run inference
 # ------------------------------------------------------------
-prompt = "Explain why Python is popular for AI development in 3 sentences."
-print(f"\n💬 Prompt: {prompt}\n")
+if __name__ == "__main__":
+    prompt = "Explain why Python is popular for AI development in 3 sentences."
+    print(f"\n💬 Prompt: {prompt}\n")
 
-response = llm(prompt)
+    response = generate(prompt)
 
-print("🧠 Model Response:")
-print(response)
+    print("🧠 Model Response:")
+    print(response)
@@ -3,7 +3,8 @@
 Downloads and caches the Gemma 2 2B IT model from Hugging Face.
 - Loads HUGGINGFACE_HUB_TOKEN from environment or .env
 - Verifies access to gated repo before attempting large downloads
-- Saves tokenizer and model to LOCAL_DIR
+- Downloads only safetensors weights, configs and tokenizer files straight into
+  LOCAL_DIR (no model instantiation, so no full-size copy of the weights in RAM)
 """
 
 import os
@@ -42,12 +43,10 @@ print("🔒 Using Hugging Face token from environment (will not be printed).")
 
 # Import optional libs and handle missing packages gracefully
 try:
-    import torch
-    from transformers import AutoTokenizer, AutoModelForCausalLM
-    from huggingface_hub import hf_hub_download
+    from huggingface_hub import hf_hub_download, snapshot_download
 except Exception as e:
     print("❌ Required libraries not installed or import failed.")
-    print("   Install with: pip install transformers huggingface_hub torch python-dotenv")
+    print("   Install with: pip install huggingface_hub python-dotenv")
     raise
 
 # Quick access check to the gated repo by attempting to fetch config.json metadata
@@ -63,34 +62,20 @@ except Exception as e:
 
 print("\n⬇️  Beginning download of tokenizer and model (this may take time & bandwidth)...")
 
-# Decide device mapping and dtype
-device_map = "auto"
-load_kwargs = {"device_map": device_map}
+# Only the files needed for inference: mmap-able safetensors shards, configs and
+# tokenizer. Skips duplicate weight formats (e.g. *.bin / *.gguf) in the repo.
+ALLOW_PATTERNS = ["*.safetensors", "*.json", "tokenizer*", "*.model"]
 
-# If CUDA is available prefer bfloat16 when possible (best-effort)
-if torch.cuda.is_available():
-    try:
-        # bfloat16 may not be supported on all GPUs; transformers will handle if unsupported
-        load_kwargs["torch_dtype"] = torch.bfloat16
-        print("GPU detected -> requesting bfloat16 dtype (if supported).")
-    except Exception:
-        print("GPU detected but couldn't set bfloat16; using default dtype.")
-else:
-    # CPU-only: do not set torch_dtype to bfloat16; leave default to avoid incompatibility
-    print("No GPU detected -> loading for CPU (this will be slower).")
-
-# Perform downloads using use_auth_token so huggingface_hub knows to use the token
 try:
-    print("Downloading tokenizer...")
-    tokenizer = AutoTokenizer.from_pretrained(MODEL_ID, use_auth_token=HF_TOKEN)
-    tokenizer.save_pretrained(LOCAL_DIR)
-    print(f"Tokenizer saved to: {LOCAL_DIR}")
-
-    print("Downloading model (this can be large)...")
-    model = AutoModelForCausalLM.from_pretrained(MODEL_ID, use_auth_token=HF_TOKEN, **load_kwargs)
-    # Save model weights/config locally
-    model.save_pretrained(LOCAL_DIR)
-    print(f"Model saved to: {LOCAL_DIR}")
+    print("Downloading model and tokenizer files (this can be large)...")
+    snapshot_download(
+        repo_id=MODEL_ID,
+        local_dir=LOCAL_DIR,
+        allow_patterns=ALLOW_PATTERNS,
+        token=HF_TOKEN,
+        repo_type="model",
+    )
+    print(f"Model and tokenizer saved to: {LOCAL_DIR}")
 
     print("\n✅ Download complete. You can now run offline inference pointing to this folder.")
     print("Example path to use in your scripts:", str(LOCAL_DIR))
@@ -1,13 +1,49 @@
 # app.py
+import asyncio
 import streamlit as st
 from gemmabot import GemmaBot
 
 # Title
 st.title("Text Summarizer")
 
-# Initialize the model only once (to avoid reloading on every rerun)
-if "bot" not in st.session_state:
-    st.session_state.bot = GemmaBot()
+# Initialize the model only once per process (shared across sessions and reruns)
+@st.cache_resource
+def get_bot():
+    return GemmaBot()
+
+bot = get_bot()
+
+# Max paragraphs summarized concurrently (keeps us under HF rate limits)
+MAX_CONCURRENCY = 5
+
+
+def _is_rate_limited(err: Exception) -> bool:
+    text = str(err).lower()
+    return "429" in text or "rate limit" in text
+
+
+async def _summarize_paragraphs(paragraphs):
+    semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+
+    async def summarize_one(paragraph):
+        async with semaphore:
+            return await bot.arun(paragraph)
+
+    return await asyncio.gather(*(summarize_one(p) for p in paragraphs))
+
+
+def summarize(text: str) -> str:
+    """Summarize each paragraph concurrently; fall back to one at a time if rate limited."""
+    paragraphs = [p for p in text.split("\n\n") if p.strip()]
+    if len(paragraphs) <= 1:
+        return bot.run(text)
+    try:
+        summaries = asyncio.run(_summarize_paragraphs(paragraphs))
+    except Exception as e:
+        if not _is_rate_limited(e):
+            raise
+        summaries = [bot.run(p) for p in paragraphs]
+    return "\n\n".join(summaries)
 
 # User Query
 user_query = st.text_area("Enter your text to summarize:", height=150)
@@ -19,7 +55,7 @@ if st.button("Submit"):
     else:
         with st.spinner("Generating summary..."):
             try:
-                response = st.session_state.bot.run(user_query)
+                response = summarize(user_query)
                 st.success("✅ Summarization complete!")
                 st.subheader("Summary:")
                 st.write(response)
@@ -1,9 +1,10 @@
 import os
+import asyncio
 import logging
-from dotenv import load_dotenv, find_dotenv
-from langchain_huggingface import HuggingFaceEndpoint, ChatHuggingFace
-from langchain_core.messages import HumanMessage
+import threading
 from logger import setup_logger
+from hf_factory import get_chat_model, load_env
+from response_cache import make_key, response_cache
 
 os.environ["HF_HUB_OFFLINE"] = "0"
 
@@ -13,6 +14,92 @@ os.environ["HF_HUB_OFFLINE"] = "0"
 logger = setup_logger("gemmabot", log_dir="logs", level=logging.DEBUG)
 
 
+class _MicroBatcher:
+    """
+    Collects queries that arrive within `window` seconds (up to `max_batch`)
+    and dispatches them together via asyncio.gather on a background event loop.
+    A query that arrives when nothing else is queued is dispatched immediately.
+
+    Each query is still its own ainvoke HTTP call, and huggingface_hub opens a
+    fresh aiohttp session per async call, so this only pays off with a backend
+    that batches server-side; GemmaBot leaves it off by default.
+    """
+
+    def __init__(self, chat_model, window: float = 0.02, max_batch: int = 8):
+        self._chat_model = chat_model
+        self._window = window
+        self._max_batch = max_batch
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="gemmabot-batcher", daemon=True)
+        self._thread.start()
+        self._queue = asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+
+    async def _start(self) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        self._loop.create_task(self._collect(queue))
+        return queue
+
+    async def _collect(self, queue: asyncio.Queue):
+        while True:
+            batch = [await queue.get()]
+            if queue.empty():
+                # Nothing else waiting: don't make a solitary call sit out the window
+                self._loop.create_task(self._dispatch(batch))
+                continue
+            deadline = self._loop.time() + self._window
+            while len(batch) < self._max_batch:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            # Dispatch without awaiting so the next batch can be collected meanwhile
+            self._loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch):
+        from langchain_core.messages import HumanMessage
+
+        logger.debug("Dispatching batch of %d queries", len(batch))
+        results = await asyncio.gather(
+            *(self._chat_model.ainvoke([HumanMessage(content=q)]) for q, _ in batch),
+            return_exceptions=True,
+        )
+        for (_, fut), result in zip(batch, results):
+            if fut.done():
+                continue
+            if isinstance(result, BaseException):
+                fut.set_exception(result)
+            else:
+                fut.set_result(result)
+
+    async def _submit(self, query: str):
+        fut = self._loop.create_future()
+        await self._queue.put((query, fut))
+        return await fut
+
+    def invoke(self, query: str):
+        """Blocking call from any thread; returns the model's response message."""
+        return asyncio.run_coroutine_threadsafe(self._submit(query), self._loop).result()
+
+    def close(self):
+        """Cancel in-flight work and stop the background loop thread."""
+        if self._loop.is_closed():
+            return
+
+        async def _shutdown():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(_shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
 class GemmaBot:
     """
     Object-oriented wrapper around your original prompt_ui script.
@@ -21,15 +108,16 @@ class GemmaBot:
     def __init__(self,
                  repo_id: str = "google/gemma-2-2b-it",
                  task: str = "conversational",
-                 temperature: float = 0.7,
-                 hf_env_var: str = "HUGGINGFACEHUB_API_TOKEN"):
+                 temperature: float = 0.0,  # deterministic summaries, and cacheable
+                 hf_env_var: str = "HUGGINGFACEHUB_API_TOKEN",
+                 batching: bool = False):
         # Load environment variables
-        load_dotenv(find_dotenv())
+        load_env()
         self.api_token = os.getenv(hf_env_var)
-        logger.debug(f"Hugging Face API Token loaded: {bool(self.api_token)}")
+        logger.debug("HF token present: %s", bool(self.api_token))
 
         if not self.api_token:
-            logger.error(f"{hf_env_var} not found in environment variables")
+            logger.error("%s not found in environment variables", hf_env_var)
             raise ValueError(f"{hf_env_var} is required")
 
         self.repo_id = repo_id
@@ -37,38 +125,97 @@ class GemmaBot:
         self.temperature = temperature
 
         try:
-            logger.info(f"Initializing HuggingFaceEndpoint with model '{self.repo_id}' and task '{self.task}'")
-            self.llm = HuggingFaceEndpoint(
-                repo_id=self.repo_id,
-                task=self.task,
-                huggingfacehub_api_token=self.api_token,
-                temperature=self.temperature
-            )
+            logger.info("Initializing ChatHuggingFace with model '%s' and task '%s'", self.repo_id, self.task)
+            # Shared per config across bots; langchain is imported lazily inside
+            self.chat_model = get_chat_model(self.repo_id, self.task, self.temperature, None, self.api_token)
+            self.llm = self.chat_model.llm
         except Exception as e:
-            logger.exception("Failed to initialize HuggingFaceEndpoint")
+            logger.exception("Failed to initialize ChatHuggingFace")
             raise
 
+        # Warm the endpoint in the background so construction doesn't block on a cold start
+        threading.Thread(target=self._safe_warmup, name="gemmabot-warmup", daemon=True).start()
+
+        # Optional micro-batching of concurrent run() calls (see _MicroBatcher)
+        self._batcher = _MicroBatcher(self.chat_model) if batching else None
+
+    def _safe_warmup(self):
+        """Prime the remote endpoint with a 1-token call so the first user query isn't cold."""
+        from langchain_core.messages import HumanMessage
+
         try:
-            logger.info("Initializing ChatHuggingFace model...")
-            self.chat_model = ChatHuggingFace(llm=self.llm)
-        except Exception as e:
-            logger.exception("Failed to initialize ChatHuggingFace")
-            raise
+            logger.debug("Warming up HF endpoint...")
+            self.chat_model.invoke([HumanMessage(content="hi")], max_tokens=1)
+        except Exception:
+            logger.debug("Warmup call failed; ignoring")
+
+    def _cache_lookup(self, query: str):
+        """Return (cache key or None, cached response or None); temperature 0 only."""
+        if self.temperature != 0:
+            return None, None
+        cache_key = make_key(self.repo_id, "", self.temperature, None, query)
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("Response cache hit for query: %.80s...", query)
+        return cache_key, cached
 
     def run(self, query: str) -> str:
         if not isinstance(query, str) or not query.strip():
             raise ValueError("query must be a non-empty string")
 
+        from langchain_core.messages import HumanMessage
+
+        cache_key, cached = self._cache_lookup(query)
+        if cached is not None:
+            return cached
+
         try:
-            logger.info(f"Received query: {query[:80]}...")
-            response = self.chat_model.invoke([HumanMessage(content=query)])
+            logger.info("Received query: %.80s...", query)
+            if self._batcher is not None:
+                response = self._batcher.invoke(query)
+            else:
+                response = self.chat_model.invoke([HumanMessage(content=query)])
             content = getattr(response, "content", str(response))
-            logger.info(f"Generated response: {content[:100]}...")
+            logger.info("Generated response: %.100s...", content)
+            if cache_key is not None:
+                response_cache.set(cache_key, content)
             return content
         except Exception as e:
             logger.exception("Error during model invocation")
             raise
 
+    async def arun(self, query: str) -> str:
+        """Async variant of run(), for fanning several queries out with asyncio.gather."""
+        if not isinstance(query, str) or not query.strip():
+            raise ValueError("query must be a non-empty string")
+
+        from langchain_core.messages import HumanMessage
+
+        cache_key, cached = self._cache_lookup(query)
+        if cached is not None:
+            return cached
+
+        try:
+            logger.info("Received async query: %.80s...", query)
+            response = await self.chat_model.ainvoke([HumanMessage(content=query)])
+            content = getattr(response, "content", str(response))
+            logger.info("Generated response: %.100s...", content)
+            if cache_key is not None:
+                response_cache.set(cache_key, content)
+            return content
+        except Exception as e:
+            logger.exception("Error during async model invocation")
+            raise
+
+    def close(self):
+        """Stop the micro-batcher's background thread, if batching is enabled."""
+        if self._batcher is not None:
+            self._batcher.close()
+            self._batcher = None
+
+    # The response cache is shared process-wide
+    clear_cache = staticmethod(response_cache.clear)
+
 
 # Example usage for standalone testing
 if __name__ == "__main__":
@@ -77,4 +224,4 @@ if __name__ == "__main__":
         reply = bot.run("What is the capital of Nepal?")
         print(reply)
     except Exception as err:
-        logger.exception(f"Failed to run GemmaBot: {err}")
+        logger.exception("Failed to run GemmaBot: %s", err)
@@ -1,21 +1,40 @@
 import os
+import sys
+
+def _sorted_entries(path):
+    # scandir's DirEntry caches file type from the directory read (no extra stat per entry)
+    with os.scandir(path) as it:
+        return sorted(it, key=lambda e: e.name)
 
 def list_directory_tree(start_path, indent=0):
-    """Recursively prints the directory tree structure."""
-    try:
-        # Get all entries in the directory
-        entries = os.listdir(start_path)
-    except PermissionError:
-        print(" " * indent + f"[Access Denied]: {start_path}")
-        return
+    """
+    Prints the directory tree structure.
+    Walks iteratively (a stack of per-directory iterators keeps the same
+    pre-order output as recursion) and writes everything in one call.
+    """
+    lines = []
+    stack = []
+
+    def push(path, level):
+        try:
+            stack.append((iter(_sorted_entries(path)), level))
+        except PermissionError:
+            lines.append(" " * level + f"[Access Denied]: {path}\n")
 
-    for entry in entries:
-        path = os.path.join(start_path, entry)
-        if os.path.isdir(path):
-            print(" " * indent + f"[DIR]  {entry}")
-            list_directory_tree(path, indent + 4)
+    push(start_path, indent)
+    while stack:
+        entries, level = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            lines.append(" " * level + f"[DIR]  {entry.name}\n")
+            push(entry.path, level + 4)
         else:
-            print(" " * indent + f"- {entry}")
+            lines.append(" " * level + f"- {entry.name}\n")
+
+    sys.stdout.write("".join(lines))
 
 if __name__ == "__main__":
     folder_path = input("Enter the folder path to scan: ").strip()
@@ -2,71 +2,66 @@
 import logging
 import os
 import warnings
-import glob
+import heapq
 import re
 from datetime import datetime
 from logging.handlers import TimedRotatingFileHandler
-from typing import List
+from typing import List, Optional
 
 _TIMESTAMP_RE = re.compile(r"_(\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})\.log$")
+_TIMESTAMP_FMT = "%Y-%m-%d_%H-%M-%S"
 
-def _parse_timestamp_from_filename(path: str) -> datetime:
+def _timestamp_key_from_filename(name: str) -> Optional[str]:
     """
     Try to extract timestamp from filename using pattern: _YYYY-MM-DD_HH-MM-SS.log
-    If parsing fails, return None.
+    The raw string is returned as-is: for this fixed-width format lexicographic
+    order is chronological order, so no datetime parsing is needed.
+    If no timestamp is found, return None.
     """
-    base = os.path.basename(path)
-    m = _TIMESTAMP_RE.search(base)
-    if not m:
-        return None
-    ts = m.group(1)
-    try:
-        return datetime.strptime(ts, "%Y-%m-%d_%H-%M-%S")
-    except Exception:
-        return None
+    m = _TIMESTAMP_RE.search(name)
+    return m.group(1) if m else None
 
 def _purge_old_logs_global(log_dir: str, keep: int) -> List[str]:
     """
-    Glob all .log files in log_dir, keep only the newest `keep` files.
+    Scan all .log files in log_dir, keep only the newest `keep` files.
     Sorting priority:
-      1. Parsed timestamp from filename (pattern _YYYY-MM-DD_HH-MM-SS.log) if present.
+      1. Timestamp from filename (pattern _YYYY-MM-DD_HH-MM-SS.log) if present.
       2. File modification time if timestamp not found.
     Deletes the oldest files until only `keep` remain.
     Returns list of deleted file paths.
     """
-    pattern = os.path.join(log_dir, "*.log")
-    files = glob.glob(pattern)
+    try:
+        with os.scandir(log_dir) as it:
+            entries = [e for e in it if e.name.endswith(".log") and e.is_file()]
+    except OSError:
+        return []
 
-    if not files:
+    # Common case: nothing to delete, so skip stat-ing and sorting entirely
+    if len(entries) <= keep:
         return []
 
     file_infos = []
-    for p in files:
-        parsed_ts = _parse_timestamp_from_filename(p)
-        if parsed_ts:
-            sort_key = parsed_ts
-        else:
+    for e in entries:
+        sort_key = _timestamp_key_from_filename(e.name)
+        if sort_key is None:
             try:
-                sort_key = datetime.fromtimestamp(os.path.getmtime(p))
+                sort_key = datetime.fromtimestamp(e.stat().st_mtime).strftime(_TIMESTAMP_FMT)
             except Exception:
-                sort_key = datetime.fromtimestamp(0)
-        file_infos.append((p, sort_key))
+                sort_key = ""
+        file_infos.append((e.path, sort_key))
 
-    # Sort by date (oldest first)
-    file_infos.sort(key=lambda x: x[1])
+    # Select only the oldest files that need deleting
+    num_to_delete = len(file_infos) - keep
+    to_delete = heapq.nsmallest(num_to_delete, file_infos, key=lambda x: x[1])
 
     deleted = []
-    total = len(file_infos)
-    if total > keep:
-        num_to_delete = total - keep
-        to_delete = file_infos[:num_to_delete]
-        for path, _ in to_delete:
-            try:
-                os.remove(path)
-                deleted.append(path)
-            except Exception:
-                # ignore deletion failures but continue
-                pass
+    for path, _ in to_delete:
+        try:
+            os.remove(path)
+            deleted.append(path)
+        except Exception:
+            # ignore deletion failures but continue
+            pass
 
     return deleted
 
@@ -87,16 +82,9 @@ def setup_logger(module_name: str,
     os.makedirs(log_dir, exist_ok=True)
 
     # One log file per run with timestamp
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    timestamp = datetime.now().strftime(_TIMESTAMP_FMT)
     log_filename = os.path.join(log_dir, f"{module_name}_{timestamp}.log")
 
-    # Ensure the file exists immediately so purge logic can consider it
-    try:
-        open(log_filename, "a", encoding="utf-8").close()
-    except Exception:
-        # If we can't touch the file, continue; purge will still operate on existing files
-        pass
-
     logger = logging.getLogger(module_name)
     logger.setLevel(level)
 
@@ -105,13 +93,14 @@ def setup_logger(module_name: str,
         # still enforce global purge in case called again
         deleted = _purge_old_logs_global(log_dir, keep)
         if deleted:
-            logger.debug(f"Purged {len(deleted)} old log(s): {deleted}")
+            logger.debug("Purged %d old log(s): %s", len(deleted), deleted)
         return logger
 
     # Formatter
     formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s")
 
     # TimedRotatingFileHandler on the *timestamped* file
+    # (opening it here creates the file, so the purge below already counts it)
     file_handler = TimedRotatingFileHandler(
         filename=log_filename,
         when=when,
@@ -146,7 +135,7 @@ def setup_logger(module_name: str,
     # Purge old logs globally (keep only `keep` most recent files)
     deleted = _purge_old_logs_global(log_dir, keep)
     if deleted:
-        logger.debug(f"Purged {len(deleted)} old log(s): {deleted}")
+        logger.debug("Purged %d old log(s): %s", len(deleted), deleted)
 
-    logger.debug(f"Logger initialized: {log_filename}")
+    logger.debug("Logger initialized: %s", log_filename)
     return logger
@@ -5,9 +5,12 @@ from metabot import MetaBot
 # Title
 st.title("Text Summarizer")
 
-# Initialize the model only once (to avoid reloading on every rerun)
-if "bot" not in st.session_state:
-    st.session_state.bot = MetaBot()
+# Initialize the model only once per process (shared across sessions and reruns)
+@st.cache_resource
+def get_bot():
+    return MetaBot()
+
+bot = get_bot()
 
 # User Query
 user_query = st.text_area("Enter your text to summarize:", height=150)
@@ -19,9 +22,9 @@ if st.button("Submit"):
     else:
         with st.spinner("Generating summary..."):
             try:
-                response = st.session_state.bot.run(user_query)
-                st.success("✅ Summarization complete!")
+                # Stream tokens as they arrive instead of waiting for the full reply
                 st.subheader("Summary:")
-                st.write(response)
+                st.write_stream(bot.run_stream(user_query))
+                st.success("✅ Summarization complete!")
             except Exception as e:
                 st.error(f"❌ Error during summarization: {e}")
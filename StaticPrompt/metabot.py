@@ -1,9 +1,11 @@
 # metabot.py
 import os
+import importlib.util
 import logging
 import json
+import random
 import time
-from dotenv import load_dotenv, find_dotenv
+from typing import Iterator, Optional
 
 # Logger setup (fallback if logger.py missing)
 try:
@@ -14,21 +16,77 @@ except Exception:
     logger = logging.getLogger("metabot")
     os.makedirs("logs", exist_ok=True)
 
-# LangChain imports (with fallback flag)
-_HAS_LANGCHAIN = False
-try:
-    from langchain_huggingface import HuggingFaceEndpoint, ChatHuggingFace
-    from langchain_core.messages import HumanMessage, SystemMessage
-    _HAS_LANGCHAIN = True
+# LangChain availability flag; the packages themselves are imported on first use
+# so `import metabot` doesn't pay for transformers/huggingface_hub at startup
+_HAS_LANGCHAIN = all(
+    importlib.util.find_spec(m) is not None for m in ("langchain_huggingface", "langchain_core")
+)
+if _HAS_LANGCHAIN:
     logger.info("LangChain integration available.")
-except ImportError:
+else:
     logger.warning("LangChain not available; using REST fallback only.")
 
 # Standard libs for REST
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson is a much faster encoder/decoder for large summarization payloads
+try:
+    import orjson
+
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    _json_loads = json.loads
+
+from hf_factory import get_chat_model, load_env
+from response_cache import make_key, response_cache
+from semantic_cache import SemanticCache
 
 os.environ.setdefault("HF_HUB_OFFLINE", "0")
 
+SYSTEM_PROMPT = "You are a helpful AI assistant focused on Generative AI and Machine Learning."
+
+# 429 (rate limited) / 503 (model loading) are retried with backoff before giving up
+MAX_RETRIES = 4
+MAX_BACKOFF = 30.0
+
+
+def _stream_event_text(event) -> Optional[str]:
+    """Text delta from one streamed event (OpenAI-style chat chunk or TGI token event)."""
+    if isinstance(event, dict):
+        if "error" in event:
+            raise RuntimeError(f"HF Error: {event['error']}")
+        if event.get("choices"):
+            return (event["choices"][0].get("delta") or {}).get("content")
+        token = event.get("token")
+        if isinstance(token, dict) and not token.get("special"):
+            return token.get("text")
+    return None
+
+
+def _raise_hf_error(error):
+    raise RuntimeError(f"HF Error: {error}")
+
+
+# (predicate, extractor) per known non-streaming response shape, tried in order
+_EXTRACTORS = (
+    # text-generation style: [{"generated_text": ...}]
+    (lambda d: isinstance(d, list) and d and isinstance(d[0], dict) and "generated_text" in d[0],
+     lambda d: d[0]["generated_text"]),
+    (lambda d: isinstance(d, dict) and "generated_text" in d,
+     lambda d: d["generated_text"]),
+    # OpenAI-compatible chat completion: {"choices": [{"message": {"content": ...}}]}
+    (lambda d: isinstance(d, dict) and bool(d.get("choices")),
+     lambda d: d["choices"][0]["message"]["content"] or ""),
+    (lambda d: isinstance(d, dict) and "error" in d,
+     lambda d: _raise_hf_error(d["error"])),
+)
+
 
 class MetaBot:  # Renamed to LlamaBot? Nah, keeping for compatibility—it's a generic HF wrapper now
     """
@@ -45,13 +103,15 @@ class MetaBot:  # Renamed to LlamaBot? Nah, keeping for compatibility—it's a g
         max_new_tokens: int = 256,
         hf_env_var: str = "HUGGINGFACEHUB_API_TOKEN",
         timeout: int = 60,
+        semantic_cache: bool = False,
+        semantic_threshold: float = 0.95,
     ):
-        load_dotenv(find_dotenv())
+        load_env()
         self.api_token = os.getenv(hf_env_var)
-        logger.debug(f"HF API Token loaded: {bool(self.api_token)}")
+        logger.debug("HF API Token loaded: %s", bool(self.api_token))
 
         if not self.api_token:
-            logger.error(f"{hf_env_var} not found.")
+            logger.error("%s not found.", hf_env_var)
             raise ValueError(f"{hf_env_var} is required. Add to .env file.")
 
         self.repo_id = repo_id
@@ -60,26 +120,55 @@ class MetaBot:  # Renamed to LlamaBot? Nah, keeping for compatibility—it's a g
         self.max_new_tokens = int(max_new_tokens)
         self.timeout = int(timeout)
 
+        # Paraphrase-level cache (optional deps: sentence-transformers + faiss).
+        # Opt-in: it embeds the whole prompt, so templated prompts that differ only
+        # in a few filled-in fields can look like paraphrases of each other.
+        self.semantic_cache = None
+        if semantic_cache:
+            if SemanticCache.available():
+                self.semantic_cache = SemanticCache(
+                    namespace=f"{self.repo_id}_{self.max_new_tokens}",
+                    threshold=semantic_threshold,
+                )
+            else:
+                logger.info("sentence-transformers/faiss not installed; semantic cache disabled.")
+
+        # The system prompt is constant, so build its message forms once
+        # (the LangChain SystemMessage is built with the chat model below)
+        self._system_dict = {"role": "system", "content": SYSTEM_PROMPT}
+        self._system_msg = None
+
+        # Constant part of the REST payload; _build_payload() adds the messages
+        # to a shallow copy, so concurrent requests never share a dict.
+        self._payload_skel = {
+            "parameters": {
+                "max_new_tokens": self.max_new_tokens,
+                "temperature": self.temperature,
+            },
+        }
+
         # LangChain init (if available)
         self.llm = None
         self.chat_model = None
         if _HAS_LANGCHAIN:
             try:
-                logger.info(f"Initializing HuggingFaceEndpoint: {repo_id} (task: {task})")
-                self.llm = HuggingFaceEndpoint(
-                    repo_id=self.repo_id,
-                    task=self.task,
-                    huggingfacehub_api_token=self.api_token,
-                    temperature=self.temperature,
-                    max_new_tokens=self.max_new_tokens,
+                # find_spec can't tell a broken install from a working one; an
+                # ImportError here just means we fall back to REST
+                from langchain_core.messages import SystemMessage
+                self._system_msg = SystemMessage(content=SYSTEM_PROMPT)
+
+                logger.info("Initializing ChatHuggingFace: %s (task: %s)", repo_id, task)
+                # Shared per config across bots (see hf_factory)
+                self.chat_model = get_chat_model(
+                    self.repo_id, self.task, self.temperature, self.max_new_tokens, self.api_token
                 )
-                logger.info("Initializing ChatHuggingFace...")
-                self.chat_model = ChatHuggingFace(llm=self.llm)
+                self.llm = self.chat_model.llm
                 logger.info("LangChain chat integration ready.")
             except Exception as e:
                 logger.exception("LangChain init failed; using REST fallback.")
                 self.llm = None
                 self.chat_model = None
+                self._system_msg = None
 
         # REST setup
         self.rest_url = f"https://api-inference.huggingface.co/models/{self.repo_id}"
@@ -89,85 +178,239 @@ class MetaBot:  # Renamed to LlamaBot? Nah, keeping for compatibility—it's a g
             "Content-Type": "application/json",
         }
 
+        # Pooled keep-alive session: repeated calls skip the TCP/TLS handshake
+        self._session = requests.Session()
+        self._session.headers.update(self.rest_headers)
+        retry = Retry(
+            total=3,
+            read=0,  # never re-POST after a read timeout: the generation may already be running/billed
+            backoff_factor=0.3,
+            status_forcelist=[502, 504],  # 429/503 are handled by _post() with Retry-After awareness
+            allowed_methods=frozenset(["POST"]),
+            raise_on_status=False,  # hand the final response to the status handling below
+        )
+        self._session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=retry))
+
+    def __del__(self):
+        session = getattr(self, "_session", None)
+        if session is not None:
+            session.close()
+
     def _call_langchain(self, query: str) -> str:
         """Invoke via ChatHuggingFace (OpenAI-style messages)."""
         if not self.chat_model:
             raise RuntimeError("Chat model not available.")
 
         try:
-            system_msg = SystemMessage(content="You are a helpful AI assistant focused on Generative AI and Machine Learning.")
+            from langchain_core.messages import HumanMessage
+
             logger.debug("Invoking ChatHuggingFace...")
-            response = self.chat_model.invoke([system_msg, HumanMessage(content=query)])
+            response = self.chat_model.invoke([self._system_msg, HumanMessage(content=query)])
             content = getattr(response, "content", str(response))
             return content.strip()
         except Exception as e:
             logger.exception("LangChain invocation failed.")
             raise
 
+    def _build_payload(self, query: str, stream: bool = False) -> dict:
+        payload = dict(self._payload_skel)
+        payload["messages"] = [self._system_dict, {"role": "user", "content": query}]
+        if stream:
+            payload["stream"] = True
+        return payload
+
     def _call_rest_conversational(self, query: str) -> str:
         """REST call for conversational task (messages format)."""
-        payload = {
-            "messages": [
-                {"role": "system", "content": "You are a helpful AI assistant focused on Generative AI and Machine Learning."},
-                {"role": "user", "content": query},
-            ],
-            "parameters": {
-                "max_new_tokens": self.max_new_tokens,
-                "temperature": self.temperature,
-            },
-        }
+        payload = self._build_payload(query)
 
-        logger.debug(f"REST payload: {json.dumps(payload, indent=2)}")
-        try:
-            resp = requests.post(self.rest_url, headers=self.rest_headers, json=payload, timeout=self.timeout)
-        except requests.exceptions.RequestException as re:
-            logger.exception("Network error.")
-            raise
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("REST payload: %s", _json_dumps(payload).decode("utf-8"))
+        resp = self._post(_json_dumps(payload))
 
         if resp.status_code == 200:
             try:
-                data = resp.json()
+                data = _json_loads(resp.content)
             except json.JSONDecodeError:
                 logger.error("Invalid JSON from HF.")
                 raise RuntimeError("Invalid response from HF API.")
 
-            # Llama conversational returns list of dicts with 'generated_text'
-            if isinstance(data, list) and data and "generated_text" in data[0]:
-                return data[0]["generated_text"].strip()
-            if isinstance(data, dict) and "generated_text" in data:
-                return data["generated_text"].strip()
-            if isinstance(data, dict) and "error" in data:
-                raise RuntimeError(f"HF Error: {data['error']}")
-            logger.warning(f"Unexpected response: {data}")
+            for matches, extract in _EXTRACTORS:
+                if matches(data):
+                    return extract(data).strip()
+            logger.warning("Unexpected response: %s", data)
             return json.dumps(data)
 
         else:
-            err_text = resp.json() if resp.headers.get('content-type') == 'application/json' else resp.text
-            logger.error(f"HF API error {resp.status_code}: {err_text}")
-            if resp.status_code == 401:
-                raise RuntimeError("401 Unauthorized - Invalid token.")
-            if resp.status_code == 403:
-                raise RuntimeError("403 Forbidden - Accept model license on HF or token lacks access.")
+            self._raise_for_error_status(resp)
+
+    def _post(self, body: bytes, stream: bool = False):
+        """POST to the inference API, waiting out 429 and 503 responses up to MAX_RETRIES times."""
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                resp = self._session.post(self.rest_url, data=body, timeout=self.timeout, stream=stream)
+            except requests.exceptions.RequestException:
+                logger.exception("Network error.")
+                raise
+            if resp.status_code not in (429, 503) or attempt == MAX_RETRIES:
+                return resp
+            delay = self._retry_delay(resp, attempt)
+            logger.warning("HF API returned %s; retrying in %.1fs (%d/%d).",
+                           resp.status_code, delay, attempt + 1, MAX_RETRIES)
+            resp.close()
+            time.sleep(delay)
+
+    @staticmethod
+    def _retry_delay(resp, attempt: int) -> float:
+        """Seconds to wait: Retry-After on 429, estimated_time on 503, else jittered exponential."""
+        default = min(2 ** attempt * 0.5 * random.uniform(0.5, 1.5), MAX_BACKOFF)
+        try:
             if resp.status_code == 429:
-                raise RuntimeError("429 Rate limited - Wait and retry.")
-            raise RuntimeError(f"HF API failed: {resp.status_code} - {err_text}")
+                return min(float(resp.headers["Retry-After"]), MAX_BACKOFF)
+            # 503 while the model loads; HF reports how long it expects to take
+            return min(float(_json_loads(resp.content).get("estimated_time", 5)), MAX_BACKOFF)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            return default
+
+    @staticmethod
+    def _raise_for_error_status(resp) -> None:
+        """Log a non-200 HF response and raise a RuntimeError describing it."""
+        err_text = resp.json() if resp.headers.get('content-type') == 'application/json' else resp.text
+        logger.error("HF API error %s: %s", resp.status_code, err_text)
+        if resp.status_code == 401:
+            raise RuntimeError("401 Unauthorized - Invalid token.")
+        if resp.status_code == 403:
+            raise RuntimeError("403 Forbidden - Accept model license on HF or token lacks access.")
+        if resp.status_code == 429:
+            raise RuntimeError("429 Rate limited - Wait and retry.")
+        raise RuntimeError(f"HF API failed: {resp.status_code} - {err_text}")
+
+    def _stream_rest_conversational(self, query: str) -> Iterator[str]:
+        """Streaming REST call; parses server-sent events (`data: {...}` lines)."""
+        payload = self._build_payload(query, stream=True)
+
+        resp = self._post(_json_dumps(payload), stream=True)
+
+        with resp:
+            if resp.status_code != 200:
+                self._raise_for_error_status(resp)
+            for line in resp.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    event = _json_loads(data)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping malformed stream event: %s", data[:200])
+                    continue
+                text = _stream_event_text(event)
+                if text:
+                    yield text
 
     def run(self, query: str) -> str:
         if not isinstance(query, str) or not query.strip():
             raise ValueError("Query must be a non-empty string.")
 
-        logger.info(f"Query: {query[:100]}...")
+        logger.info("Query: %.100s...", query)
+
+        cache_key, embedding, hit = self._cache_lookup(query)
+        if hit is not None:
+            return hit
+
+        response = self._generate(query)
+        self._cache_store(cache_key, embedding, response)
+        return response
+
+    def run_stream(self, query: str) -> Iterator[str]:
+        """
+        Like run(), but yields the response in chunks as tokens arrive
+        (e.g. for st.write_stream). Cache hits are yielded as one chunk.
+        """
+        if not isinstance(query, str) or not query.strip():
+            raise ValueError("Query must be a non-empty string.")
 
+        logger.info("Streaming query: %.100s...", query)
+
+        cache_key, embedding, hit = self._cache_lookup(query)
+        if hit is not None:
+            yield hit
+            return
+
+        parts = []
+        for piece in self._generate_stream(query):
+            parts.append(piece)
+            yield piece
+        self._cache_store(cache_key, embedding, "".join(parts).strip())
+
+    def _cache_lookup(self, query: str):
+        """Return (exact cache key, semantic embedding, cached response or None)."""
+        # Only deterministic calls are cached; sampled outputs must stay fresh
+        cache_key = None
+        if self.temperature == 0:
+            cache_key = make_key(self.repo_id, SYSTEM_PROMPT, self.temperature, self.max_new_tokens, query)
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                logger.info("Response cache hit.")
+                return cache_key, None, cached
+
+        # Semantic cache only for near-deterministic sampling
+        embedding = None
+        if self.semantic_cache is not None and self.temperature < 0.1:
+            try:
+                hit, embedding = self.semantic_cache.lookup(query)
+            except Exception:
+                logger.exception("Semantic cache lookup failed; disabling it.")
+                self.semantic_cache, hit = None, None
+            if hit is not None:
+                logger.info("Semantic cache hit.")
+                return cache_key, embedding, hit
+
+        return cache_key, embedding, None
+
+    def _cache_store(self, cache_key: Optional[str], embedding, response: str) -> None:
+        if cache_key is not None:
+            response_cache.set(cache_key, response)
+        if embedding is not None and self.semantic_cache is not None:
+            self.semantic_cache.add(embedding, response)
+
+    def _generate(self, query: str) -> str:
         # Try LangChain first
         if _HAS_LANGCHAIN and self.chat_model:
             try:
                 return self._call_langchain(query)
             except Exception as e:
-                logger.warning(f"LangChain failed: {e}; falling back to REST.")
+                logger.warning("LangChain failed: %s; falling back to REST.", e)
 
         # REST fallback
         return self._call_rest_conversational(query)
 
+    def _generate_stream(self, query: str) -> Iterator[str]:
+        # Try LangChain first; fall back to REST only if nothing was yielded yet
+        if _HAS_LANGCHAIN and self.chat_model:
+            started = False
+            try:
+                from langchain_core.messages import HumanMessage
+
+                logger.debug("Streaming from ChatHuggingFace...")
+                for chunk in self.chat_model.stream([self._system_msg, HumanMessage(content=query)]):
+                    text = getattr(chunk, "content", "")
+                    if text:
+                        started = True
+                        yield text
+                return
+            except Exception as e:
+                if started:
+                    logger.exception("LangChain stream failed mid-response.")
+                    raise
+                logger.warning("LangChain streaming failed: %s; falling back to REST.", e)
+
+        # REST fallback
+        yield from self._stream_rest_conversational(query)
+
+    # The response cache is shared process-wide
+    clear_cache = staticmethod(response_cache.clear)
+
 
 # Standalone test
 if __name__ == "__main__":
@@ -179,7 +422,7 @@ if __name__ == "__main__":
             max_new_tokens=256,
         )
         q = "What is the capital of Nepal?"
-        logger.info(f"Test query: {q}")
+        logger.info("Test query: %s", q)
         reply = bot.run(q)
         print("---- MODEL REPLY ----")
         print(reply)
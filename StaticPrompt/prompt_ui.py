@@ -8,21 +8,20 @@ import streamlit as st
 
 os.environ["HF_HUB_OFFLINE"] = "0"
 
-# Configure logging
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
-)
+# Configure logging once (Streamlit re-executes this module on every rerun)
+root = logging.getLogger()
+if not root.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
 
 logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv(find_dotenv())
 api_token = os.getenv("HUGGINGFACEHUB_API_TOKEN")
-logger.debug(f"Hugging Face API Token: {api_token}")
+logger.debug("HF token present: %s", bool(api_token))
 
 if not api_token:
     logger.error("HUGGINGFACEHUB_API_TOKEN not found in environment variables")
@@ -52,9 +51,9 @@ except Exception as e:
 # Query the model
 query = "What is the capital of India?"
 try:
-    logger.info(f"Sending query: {query}")
+    logger.info("Sending query: %.100s...", query)
     response = chat_model.invoke([HumanMessage(content=query)])
-    logger.info(f"Received response: {response.content}")
+    logger.info("Received response: %.100s...", response.content)
     print(response.content)
 except Exception as e:
     logger.error(f"Error during model invocation: {str(e)}")
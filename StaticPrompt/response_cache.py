@@ -0,0 +1,118 @@
+# response_cache.py
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger("response_cache")
+
+# Namespace for entries in the shared Redis layer
+REDIS_PREFIX = "llm:"
+
+
+def make_key(repo_id: str, system: str, temperature: float, max_new_tokens, query: str) -> str:
+    """
+    Build a compact cache key (blake2b hex digest) for one model call.
+    Hashing keeps memory flat even for long summarization inputs.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for part in (repo_id, system or "", repr(float(temperature)), str(max_new_tokens), query):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class ResponseCache:
+    """
+    Thread-safe in-process LRU cache of model responses.
+    Only meant for deterministic (temperature == 0) calls.
+
+    When REDIS_URL is set (and redis-py is installed), entries are also written
+    to Redis with a TTL, so they survive restarts and are shared between
+    workers/replicas; the LRU stays in front as a hot tier. If Redis is missing
+    or fails, the cache quietly falls back to the LRU alone.
+    """
+
+    def __init__(self, maxsize: int = 1024, redis_ttl: int = 24 * 60 * 60):
+        self.maxsize = maxsize
+        self.redis_ttl = redis_ttl
+        self._data: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_checked = False
+
+    def _redis_client(self):
+        # Resolved on first use, after the bots have loaded .env
+        if not self._redis_checked:
+            with self._lock:
+                if not self._redis_checked:
+                    url = os.getenv("REDIS_URL")
+                    if url:
+                        try:
+                            import redis
+                            self._redis = redis.Redis.from_url(
+                                url, socket_timeout=0.5, socket_connect_timeout=0.5
+                            )
+                        except ImportError:
+                            logger.warning("REDIS_URL is set but redis is not installed; using in-process cache only.")
+                    self._redis_checked = True
+        return self._redis
+
+    def _disable_redis(self) -> None:
+        logger.warning("Redis cache unavailable; using in-process cache only.", exc_info=True)
+        self._redis = None
+
+    def _get_local(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._get_local(key)
+        if value is not None:
+            return value
+
+        client = self._redis_client()
+        if client is None:
+            return None
+        try:
+            raw = client.get(REDIS_PREFIX + key)
+        except Exception:
+            self._disable_redis()
+            return None
+        if raw is None:
+            return None
+        value = raw.decode("utf-8")
+        self._set_local(key, value)
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        self._set_local(key, value)
+
+        client = self._redis_client()
+        if client is None:
+            return
+        try:
+            client.setex(REDIS_PREFIX + key, self.redis_ttl, value)
+        except Exception:
+            self._disable_redis()
+
+    def clear(self) -> None:
+        """Clear the in-process tier (shared Redis entries expire via their TTL)."""
+        with self._lock:
+            self._data.clear()
+
+
+# Shared by every bot in the process
+response_cache = ResponseCache(maxsize=1024)